@@ -2,71 +2,81 @@
 # Argument parser for MemSift
 
 import argparse
+import functools
 import sys
 
+@functools.lru_cache(maxsize=None)
+def _get_parser():
+    """Build the argument parser once; every ArgParser instance shares it"""
+    parser = argparse.ArgumentParser(
+        description="MemSift - Memory Extraction and Analysis Tool",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    # General options
+    general = parser.add_argument_group("General Options")
+    general.add_argument("-v", "--verbose", action="store_true", 
+                      help="Enable verbose output")
+    general.add_argument("-n", "--no-banner", action="store_true", 
+                      help="Suppress banner display")
+    general.add_argument("-j", "--jobs", type=int, default=1,
+                      help="Number of worker processes when scanning several processes (default: 1)")
+    
+    # Target options
+    target = parser.add_argument_group("Target Options")
+    target.add_argument("-p", "--pid", type=str, 
+                      help="Process ID(s) to target (comma-separated for multiple PIDs)")
+    target.add_argument("-m", "--name", type=str,
+                      help="Process name to target (can match multiple processes)")
+    target.add_argument("-a", "--all-memory", action="store_true", 
+                      help="Scan all memory regions (not just heap/stack)")
+    
+    # Regex options
+    regex = parser.add_argument_group("Regex Options")
+    regex.add_argument("-r", "--regex-file", type=str, 
+                     help="File containing regex patterns")
+    
+    # Output options
+    output = parser.add_argument_group("Output Options")
+    output.add_argument("-o", "--output-format", type=str, 
+                      choices=["plain", "xml", "html"], default="plain",
+                      help="Output format (default: plain)")
+    output.add_argument("-f", "--output-file", type=str, 
+                      help="Write output to specified file")
+    output.add_argument("-i", "--show-info", action="store_true", 
+                      help="Show detailed process information")
+    
+    # Timeline options
+    timeline = parser.add_argument_group("Timeline Options")
+    timeline.add_argument("-t", "--timeline", action="store_true",
+                        help="Enable timeline tracking of sensitive data")
+    timeline.add_argument("--timeline-json", type=str,
+                        help="Save timeline data to specified JSON file")
+    timeline.add_argument("--pretty-json", action="store_true",
+                        help="Indent the timeline JSON file (compact by default)")
+    timeline.add_argument("--timeline-html", type=str,
+                        help="Generate HTML timeline visualization to specified file")
+    timeline.add_argument("--timeline-interval", type=int, default=60,
+                        help="Interval in seconds for periodic scanning in timeline mode (default: 60)")
+    
+    return parser
+
 class ArgParser:
     """Handles command-line argument parsing for MemSift"""
     
     def __init__(self, options):
         """Initialize with options object for storing results"""
         self.options = options
-        self.parser = argparse.ArgumentParser(
-            description="MemSift - Memory Extraction and Analysis Tool",
-            formatter_class=argparse.RawDescriptionHelpFormatter
-        )
-        self._setup_arguments()
-    
-    def _setup_arguments(self):
-        """Set up all command-line arguments"""
-        # General options
-        general = self.parser.add_argument_group("General Options")
-        general.add_argument("-v", "--verbose", action="store_true", 
-                          help="Enable verbose output")
-        general.add_argument("-n", "--no-banner", action="store_true", 
-                          help="Suppress banner display")
-        
-        # Target options
-        target = self.parser.add_argument_group("Target Options")
-        target.add_argument("-p", "--pid", type=str, 
-                          help="Process ID(s) to target (comma-separated for multiple PIDs)")
-        target.add_argument("-m", "--name", type=str,
-                          help="Process name to target (can match multiple processes)")
-        target.add_argument("-a", "--all-memory", action="store_true", 
-                          help="Scan all memory regions (not just heap/stack)")
-        
-        # Regex options
-        regex = self.parser.add_argument_group("Regex Options")
-        regex.add_argument("-r", "--regex-file", type=str, 
-                         help="File containing regex patterns")
-        
-        # Output options
-        output = self.parser.add_argument_group("Output Options")
-        output.add_argument("-o", "--output-format", type=str, 
-                          choices=["plain", "xml", "html"], default="plain",
-                          help="Output format (default: plain)")
-        output.add_argument("-f", "--output-file", type=str, 
-                          help="Write output to specified file")
-        output.add_argument("-i", "--show-info", action="store_true", 
-                          help="Show detailed process information")
-        
-        # Timeline options
-        timeline = self.parser.add_argument_group("Timeline Options")
-        timeline.add_argument("-t", "--timeline", action="store_true",
-                            help="Enable timeline tracking of sensitive data")
-        timeline.add_argument("--timeline-json", type=str,
-                            help="Save timeline data to specified JSON file")
-        timeline.add_argument("--timeline-html", type=str,
-                            help="Generate HTML timeline visualization to specified file")
-        timeline.add_argument("--timeline-interval", type=int, default=60,
-                            help="Interval in seconds for periodic scanning in timeline mode (default: 60)")
+        self.parser = _get_parser()
     
-    def parse_args(self):
-        """Parse command-line arguments and update options"""
-        args = self.parser.parse_args()
+    def parse_args(self, argv=None):
+        """Parse command-line arguments (sys.argv by default) and update options"""
+        args = self.parser.parse_args(argv)
         
         # Update options based on parsed arguments
         self.options.verbose = args.verbose
         self.options.no_banner = args.no_banner
+        self.options.jobs = args.jobs
         self.options.pid_str = args.pid
         self.options.process_name = args.name
         self.options.dump_all = args.all_memory
@@ -76,10 +86,12 @@ class ArgParser:
         self.options.show_process_info = args.show_info
 
         # Timeline options
-        self.options.enable_timeline = args.timeline if hasattr(args, 'timeline') else False
-        self.options.timeline_json = args.timeline_json if hasattr(args, 'timeline_json') else None
-        self.options.timeline_html = args.timeline_html if hasattr(args, 'timeline_html') else None
-        self.options.timeline_scan_interval = args.timeline_interval if hasattr(args, 'timeline_interval') else 60        
+        self.options.enable_timeline = args.timeline
+        self.options.timeline_json = args.timeline_json
+        self.options.timeline_html = args.timeline_html
+        self.options.pretty_json = args.pretty_json
+        self.options.timeline_scan_interval = args.timeline_interval
+        
         # Validate arguments
         self._validate_args()
         
@@ -104,6 +116,10 @@ class ArgParser:
                 print("[!] Error: Invalid PID format. PIDs must be comma-separated integers.")
                 sys.exit(1)
                 
+        if self.options.jobs < 1:
+            print("[!] Error: Number of jobs must be at least 1.")
+            sys.exit(1)
+        
         # Can't specify both pid and process name
         if self.options.pid_str and self.options.process_name:
             print("[!] Error: Cannot specify both PID and process name. Please use only one.")
@@ -4,12 +4,64 @@
 import os
 import sys
 import time
-from modules.process_operations import ProcessOperations
+import signal
+import multiprocessing
+from modules.process_operations import ProcessOperations, PERM_READ, format_perms
 from modules.output_formatter import OutputFormatter
 
+# Controller owned by each pool worker when scanning processes in parallel
+_worker_controller = None
+
+def _worker_init(options):
+    """Set up a pool worker with its own controller and compiled patterns"""
+    global _worker_controller
+    from modules.misc import Misc
+    from modules.regex_lookup import RegexLookup
+    
+    # Ctrl+C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    misc = Misc()
+    regex_lookup = RegexLookup(options)
+    regex_lookup.load_patterns(quiet=True)
+    _worker_controller = Controller(options, regex_lookup, misc)
+    # Progress is reported by the parent as it merges worker results
+    regex_lookup.on_match = None
+
+def _scan_one_pid(pid):
+    """Scan one process in a pool worker
+    
+    Returns (pid, status, results) where status is "ok", "failed" or
+    "permission" and results are the unique matches found in this process.
+    """
+    controller = _worker_controller
+    # Fresh result sets per PID; a chunk of PIDs is pickled back only after all of them ran
+    controller.regex_lookup.reset_results()
+    
+    try:
+        status = "ok" if controller.scan_process(pid) else "failed"
+    except PermissionError:
+        status = "permission"
+    except Exception as e:
+        if controller.options.verbose:
+            controller.misc.print_error(f"Error scanning process {pid}: {str(e)}")
+        status = "failed"
+    
+    return pid, status, controller.regex_lookup.results
+
 class Controller:
     """Orchestrates the memory scanning process"""
     
+    # Region filtering, evaluated once per region of every scanned process
+    _MIN_REGION_SIZE = 100
+    _MAX_REGION_SIZE = 50 * 1024 * 1024  # 50MB
+    _SCANNABLE_PATH_PREFIXES = ('[heap]', '[stack', '[anon')
+    
+    # Chunk size grows with the region (about 16 chunks per region) between these
+    # bounds; the upper one stays below read_memory_region's 10MB limit
+    _MIN_CHUNK_SIZE = 1 * 1024 * 1024  # 1MB
+    _MAX_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+    
     def __init__(self, options, regex_lookup, misc):
         """Initialize with options, regex lookup, and misc utilities"""
         self.options = options
@@ -20,6 +72,7 @@ class Controller:
         self.scan_count = 0
         self.match_count = 0
         self.successful_processes = 0
+        self.regex_lookup.on_match = self._on_match
         
         # Initialize timeline tracker if timeline is enabled
         self.timeline_tracker = None
@@ -37,24 +90,30 @@ class Controller:
         
         # Reset counter for successful processes
         self.successful_processes = 0
-        attempted = 0
         
-        # Scan each PID
-        for pid in pids:
-            # Skip our own process
-            if pid == os.getpid():
-                continue
-                
-            attempted += 1
-            try:
-                if self.scan_process(pid):
-                    self.successful_processes += 1
-            except KeyboardInterrupt:
-                self.misc.print_info("Scan interrupted by user")
-                raise
-            except Exception as e:
-                if self.options.verbose:
-                    self.misc.print_error(f"Error scanning process {pid}: {str(e)}")
+        # Skip our own process
+        target_pids = [pid for pid in pids if pid != os.getpid()]
+        attempted = len(target_pids)
+        
+        jobs = self._worker_count(attempted)
+        if jobs > 1 and not self.timeline_tracker:
+            # Each worker has its own interpreter (and GIL) and its own ptrace attachment
+            self._scan_pids_parallel(target_pids, jobs)
+        else:
+            if jobs > 1:
+                self.misc.print_verbose("Timeline tracking enabled, scanning processes serially", self.options)
+            
+            # Scan each PID
+            for pid in target_pids:
+                try:
+                    if self.scan_process(pid):
+                        self.successful_processes += 1
+                except KeyboardInterrupt:
+                    self.misc.print_info("Scan interrupted by user")
+                    raise
+                except Exception as e:
+                    if self.options.verbose:
+                        self.misc.print_error(f"Error scanning process {pid}: {str(e)}")
         
         self.misc.print_info(f"Successfully scanned {self.successful_processes} out of {attempted} attempted processes")
         
@@ -82,7 +141,7 @@ class Controller:
     
     def scan_all_processes(self):
         """Scan all processes on the system"""
-        pids = self.process_ops.enum_processes()
+        pids = list(self.process_ops.enum_processes())
         self.misc.print_info(f"Found {len(pids)} processes")
         
         self.successful_processes = 0
@@ -91,6 +150,7 @@ class Controller:
         permission_errors = 0
         
         # Skip kernel processes and ones without accessible memory maps
+        target_pids = []
         for pid in pids:
             # Skip our own process
             if pid == os.getpid():
@@ -100,21 +160,33 @@ class Controller:
             if pid < 10 and not self.options.verbose:
                 skipped_kernel += 1
                 continue
-                
-            attempted += 1
-            try:
-                if self.scan_process(pid):
-                    self.successful_processes += 1
-            except KeyboardInterrupt:
-                self.misc.print_info("Scan interrupted by user")
-                raise
-            except PermissionError:
-                permission_errors += 1
-                if self.options.verbose:
-                    self.misc.print_error(f"Permission denied scanning process {pid}")
-            except Exception as e:
-                if self.options.verbose:
-                    self.misc.print_error(f"Error scanning process {pid}: {str(e)}")
+            
+            target_pids.append(pid)
+        
+        attempted = len(target_pids)
+        jobs = self._worker_count(attempted)
+        if jobs > 1 and not self.timeline_tracker:
+            # Each worker has its own interpreter (and GIL) and its own ptrace attachment
+            permission_errors = self._scan_pids_parallel(target_pids, jobs)
+        else:
+            if jobs > 1:
+                self.misc.print_verbose("Timeline tracking enabled, scanning processes serially", self.options)
+            
+            # The next process' maps are read while this one is scanned
+            for pid, maps in self.process_ops.iter_process_maps(target_pids):
+                try:
+                    if self.scan_process(pid, maps):
+                        self.successful_processes += 1
+                except KeyboardInterrupt:
+                    self.misc.print_info("Scan interrupted by user")
+                    raise
+                except PermissionError:
+                    permission_errors += 1
+                    if self.options.verbose:
+                        self.misc.print_error(f"Permission denied scanning process {pid}")
+                except Exception as e:
+                    if self.options.verbose:
+                        self.misc.print_error(f"Error scanning process {pid}: {str(e)}")
         
         self.misc.print_info(f"Successfully scanned {self.successful_processes} out of {attempted} attempted processes")
         if skipped_kernel > 0:
@@ -131,8 +203,53 @@ class Controller:
         if self.options.output_file:
             self.output.write_to_file(results)
     
-    def scan_process(self, pid):
-        """Scan a specific process for sensitive information"""
+    def _worker_count(self, pid_count):
+        """Number of worker processes worth starting for pid_count processes
+        
+        A result of 1 or less means the processes should be scanned serially.
+        """
+        return min(self.options.jobs, os.cpu_count() or 1, pid_count)
+    
+    def _scan_pids_parallel(self, pids, jobs):
+        """Scan processes in a pool of jobs worker processes and merge their results
+        
+        Returns the number of processes that failed with a permission error.
+        """
+        permission_errors = 0
+        self.misc.print_info(f"Scanning with {jobs} worker processes")
+        
+        with multiprocessing.Pool(jobs, initializer=_worker_init, initargs=(self.options,)) as pool:
+            try:
+                # imap_unordered keeps only finished PIDs' results in memory
+                for pid, status, results in pool.imap_unordered(_scan_one_pid, pids, chunksize=4):
+                    if status == "ok":
+                        self.successful_processes += 1
+                    elif status == "permission":
+                        permission_errors += 1
+                        if self.options.verbose:
+                            self.misc.print_error(f"Permission denied scanning process {pid}")
+                    
+                    self.regex_lookup.merge_results(results)
+            except KeyboardInterrupt:
+                self.misc.print_info("Scan interrupted by user")
+                pool.terminate()
+                raise
+            
+            # Let workers exit on their own so their buffered output is flushed
+            pool.close()
+            pool.join()
+        
+        self.match_count = self.regex_lookup.get_result_count()
+        
+        return permission_errors
+    
+    def _on_match(self, count):
+        """Progress callback from RegexLookup as new unique matches are found"""
+        self.match_count = count
+        self.misc.print_info(f"Found {count} matches so far")
+    
+    def scan_process(self, pid, maps=None):
+        """Scan a specific process for sensitive information (maps may be pre-read by the caller)"""
         try:
             # Get process information if requested
             proc_info = ""
@@ -152,7 +269,8 @@ class Controller:
                 self.misc.print_verbose(f"Scanning process {pid}", self.options)
             
             # Get memory maps
-            maps = self.process_ops.get_process_maps(pid)
+            if maps is None:
+                maps = self.process_ops.get_process_maps(pid)
             if not maps:
                 if self.options.verbose:
                     self.misc.print_warning(f"No readable memory maps found for process {pid}")
@@ -204,86 +322,68 @@ class Controller:
     def is_scannable_region(self, region):
         """Determine if a memory region should be scanned"""
         # Skip regions with no read permission
-        if 'r' not in region['perms']:
+        if not region.perms & PERM_READ:
             return False
             
         # Skip very small regions (not worth scanning)
-        size = region['end'] - region['start']
-        if size < 100:
+        size = region.end - region.start
+        if size < self._MIN_REGION_SIZE:
             return False
             
         # Skip regions that are too large unless dump_all is set
-        max_region_size = 50 * 1024 * 1024  # 50MB
-        if size > max_region_size and not self.options.dump_all:
-            self.misc.print_verbose(f"Skipping large region at 0x{region['start']:x} (size: {size} bytes)", self.options)
+        if size > self._MAX_REGION_SIZE and not self.options.dump_all:
+            self.misc.print_verbose(f"Skipping large region at 0x{region.start:x} (size: {size} bytes)", self.options)
             return False
         
         # If dump_all is not set, only scan heap, stack and anonymous mappings
         if not self.options.dump_all:
-            path = region['path'].lower()
-            return 'heap' in path or 'stack' in path or '[anon' in path
+            return region.path.startswith(self._SCANNABLE_PATH_PREFIXES)
         
         return True
     
     def scan_memory_region(self, region, proc_info):
         """Scan a memory region for sensitive information"""
-        start_addr = region['start']
-        end_addr = region['end']
+        start_addr = region.start
+        end_addr = region.end
         size = end_addr - start_addr
         
         # Region size has already been checked in is_scannable_region
         self.misc.print_verbose(
-            f"Scanning region 0x{start_addr:x}-0x{end_addr:x} ({size} bytes) {region['perms']} {region['path']}",
+            f"Scanning region 0x{start_addr:x}-0x{end_addr:x} ({size} bytes) {format_perms(region.perms)} {region.path}",
             self.options
         )
         
         try:
-            # Read memory with appropriate chunking for large regions
-            chunk_size = 1 * 1024 * 1024  # 1MB chunks
+            # Read memory with appropriate chunking for large regions. At most two chunks
+            # are held at once (one being scanned, one being read ahead).
+            chunk_size = min(max(size >> 4, self._MIN_CHUNK_SIZE), self._MAX_CHUNK_SIZE)
             
-            # For large regions, break into chunks
-            if size > chunk_size:
-                for chunk_start in range(start_addr, end_addr, chunk_size):
-                    chunk_end = min(chunk_start + chunk_size, end_addr)
-                    self.scan_memory_chunk(chunk_start, chunk_end, proc_info, region['path'])
-            else:
-                # Small enough to read in one go
-                self.scan_memory_chunk(start_addr, end_addr, proc_info, region['path'])
+            # Large regions are split into chunks; the next chunk is read while this one is scanned
+            for chunk_start, chunk_end, data in self.process_ops.iter_memory_chunks(start_addr, end_addr, chunk_size):
+                # A chunk that could not be read has already been reported; don't read it again
+                if data is not None:
+                    self.scan_memory_chunk(chunk_start, chunk_end, proc_info, region.path, data)
                 
             # Update counters
             self.scan_count += 1
-            
-            # Display results occasionally
-            current_results = self.regex_lookup.get_result_count()
-            if current_results > self.match_count:
-                self.misc.print_info(f"Found {current_results} matches so far")
-                self.match_count = current_results
                 
         except Exception as e:
             self.misc.print_verbose(f"Error scanning memory region at 0x{start_addr:x}: {str(e)}", self.options)
     
-    def scan_memory_chunk(self, start_addr, end_addr, proc_info, path_info):
+    def scan_memory_chunk(self, start_addr, end_addr, proc_info, path_info, data=None):
         """Scan a chunk of memory for sensitive information"""
         # Record scan start time for timeline
         if self.timeline_tracker:
             scan_start_time = time.time()
         
-        # Read memory
-        data = self.process_ops.read_memory_region(start_addr, end_addr)
+        # Read memory unless the caller already has it
+        if data is None:
+            data = self.process_ops.read_memory_region(start_addr, end_addr)
         if not data or len(data) < 4:  # Need at least a few bytes to be worth scanning
             return
             
-        # Convert to string
-        try:
-            memory_str = data.decode('utf-8', errors='ignore')
-        except:
-            memory_str = str(data)
-        
-        # Strip non-ASCII characters
-        memory_str = self.misc.strip_non_ascii(memory_str)
-        
-        # Apply regex patterns
-        findings = self.regex_lookup.search_regex_with_details(memory_str, proc_info)
+        # Apply regex patterns directly to the raw bytes
+        findings = self.regex_lookup.search_regex_with_details(data, proc_info)
         
         # Record findings in timeline
         if self.timeline_tracker and findings:
@@ -294,14 +394,15 @@ class Controller:
             if ' ' in proc_info:
                 pid = proc_info.split(' ')[0]
                 
-            # Record each finding
-            for finding in findings:
+            # Record each finding; they all share one region string
+            memory_region = f"0x{start_addr:x}-0x{end_addr:x} ({path_info})"
+            for pattern_name, match in findings:
                 self.timeline_tracker.record_finding(
                     timestamp=timestamp,
                     pid=pid,
-                    pattern_type=finding['pattern'],
-                    match_data=finding['match'],
-                    memory_region=f"0x{start_addr:x}-0x{end_addr:x} ({path_info})"
+                    pattern_type=pattern_name,
+                    match_data=match,
+                    memory_region=memory_region
                 )
         
         # Record scan end time for timeline
@@ -340,5 +441,8 @@ class Controller:
             self.timeline_tracker.generate_html_timeline(self.options.timeline_html)
         elif self.options.timeline_json:
             # If HTML file not specified but JSON is, create HTML with the same base name
-            html_path = os.path.splitext(self.options.timeline_json)[0] + '.html'
+            json_path = self.options.timeline_json
+            if json_path.endswith('.gz'):
+                json_path = json_path[:-3]
+            html_path = os.path.splitext(json_path)[0] + '.html'
             self.timeline_tracker.generate_html_timeline(html_path)
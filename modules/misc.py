@@ -3,19 +3,31 @@
 
 import os
 import re
+import sys
 import datetime
-from colorama import init, Fore, Style
+
+# ANSI color escapes; MemSift only runs on Linux so no colorama shim is needed
+BLUE = "\x1b[34m"
+YELLOW = "\x1b[33m"
+RED = "\x1b[31m"
+GREEN = "\x1b[32m"
+RESET = "\x1b[0m"
 
 class Misc:
     """Utility functions for mXtract"""
     
     def __init__(self):
-        # Initialize colorama for cross-platform colored terminal output
-        init()
+        # Build the colored message prefixes once, plain when not on a terminal
+        use_color = sys.stdout.isatty()
+        self._color = (lambda code, text: f"{code}{text}{RESET}") if use_color else (lambda code, text: text)
+        self._info_pfx = self._color(BLUE, "[*]") + " "
+        self._warning_pfx = self._color(YELLOW, "[!]") + " "
+        self._error_pfx = self._color(RED, "[!]") + " "
+        self._success_pfx = self._color(GREEN, "[+]") + " "
     
     def print_banner(self):
         """Display the MemSift banner"""
-        banner = f"""{Fore.BLUE}
+        banner = """
 ┌──────────────────────────────────────────────────┐
 │                                                  │
 │  ███╗   ███╗███████╗███╗   ███╗███████╗██╗███████╗████████╗  │
@@ -28,23 +40,8 @@ class Misc:
 │  Memory Extraction and Analysis Tool                             │
 │  By: Subhash Dasyam                                              │
 └──────────────────────────────────────────────────────────────────┘
-{Style.RESET_ALL}"""
-        print(banner)
-    
-    def is_valid_ascii(self, char):
-        """Check if a character is a valid printable ASCII character"""
-        return 32 <= ord(char) <= 126
-    
-    def strip_non_ascii(self, data):
-        """Strip non-ASCII characters from a string"""
-        if isinstance(data, bytes):
-            # Convert bytes to string if needed
-            try:
-                data = data.decode('utf-8', errors='ignore')
-            except UnicodeDecodeError:
-                data = str(data)
-        
-        return ''.join(char for char in data if self.is_valid_ascii(char))
+"""
+        print(self._color(BLUE, banner))
     
     def timestamp_to_readable(self, timestamp):
         """Convert Unix timestamp to human-readable format"""
@@ -62,16 +59,16 @@ class Misc:
     
     def print_info(self, message):
         """Print informational message"""
-        print(f"{Fore.BLUE}[*]{Style.RESET_ALL} {message}")
+        sys.stdout.write(f"{self._info_pfx}{message}\n")
     
     def print_warning(self, message):
         """Print warning message"""
-        print(f"{Fore.YELLOW}[!]{Style.RESET_ALL} {message}")
+        sys.stdout.write(f"{self._warning_pfx}{message}\n")
     
     def print_error(self, message):
         """Print error message"""
-        print(f"{Fore.RED}[!]{Style.RESET_ALL} {message}")
+        sys.stdout.write(f"{self._error_pfx}{message}\n")
     
     def print_success(self, message):
         """Print success message"""
-        print(f"{Fore.GREEN}[+]{Style.RESET_ALL} {message}")
+        sys.stdout.write(f"{self._success_pfx}{message}\n")
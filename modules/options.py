@@ -8,6 +8,7 @@ class Options:
         # General options
         self.verbose = False
         self.no_banner = False
+        self.jobs = 1  # Worker processes used when scanning several processes
         
         # Target options
         self.pid_str = None  # Comma-separated process IDs string
@@ -26,6 +27,7 @@ class Options:
         self.enable_timeline = False  # Enable timeline tracking
         self.timeline_json = None     # JSON output file for timeline data
         self.timeline_html = None     # HTML output file for timeline visualization
+        self.pretty_json = False      # Indent the timeline JSON for humans (compact by default)
         self.timeline_scan_interval = 60  # Interval (seconds) for periodic scanning when in timeline mode
 
 
@@ -35,6 +37,7 @@ class Options:
             f"Options:\n"
             f"  Verbose: {self.verbose}\n"
             f"  No Banner: {self.no_banner}\n"
+            f"  Jobs: {self.jobs}\n"
             f"  PIDs: {', '.join(map(str, self.pid_list)) if self.pid_list else 'None'}\n"
             f"  Process Name: {self.process_name}\n"
             f"  Dump All: {self.dump_all}\n"
@@ -151,8 +151,8 @@ class OutputFormatter:
             
             # Create directory if it doesn't exist
             output_dir = os.path.dirname(self.options.output_file)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
                 
             with open(self.options.output_file, 'w') as f:
                 f.write(formatted_results)
@@ -2,26 +2,87 @@
 # Process memory operations using ptrace
 
 import os
+import re
 import ctypes
 import time
 import pwd
 import grp
 import struct
-from ctypes import c_long, c_void_p, c_char_p, c_ulong
+import errno
+import functools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import c_long, c_void_p, c_char_p, c_ulong, c_int, c_size_t, c_ssize_t, POINTER
 
 # Define ptrace constants
 PTRACE_ATTACH = 16
 PTRACE_DETACH = 17
 PTRACE_PEEKTEXT = 1
 PTRACE_PEEKDATA = 2
+PTRACE_SEIZE = 0x4206
+PTRACE_INTERRUPT = 0x4207
 
 # Load libc for ptrace calls
-libc = ctypes.CDLL("libc.so.6")
+libc = ctypes.CDLL("libc.so.6", use_errno=True)
 
 # Set proper return and argument types for ptrace
 libc.ptrace.argtypes = [c_ulong, c_ulong, c_void_p, c_void_p]
 libc.ptrace.restype = c_long
 
+# Returned by read_bytes(allow_ptrace=False) when only ptrace could have read the range,
+# as opposed to None for a range that cannot be read at all
+_PTRACE_NEEDED = object()
+
+# Region permission bits, parsed from the rwxp field of /proc/<pid>/maps
+PERM_READ = 1
+PERM_WRITE = 2
+PERM_EXEC = 4
+PERM_SHARED = 8
+
+@functools.lru_cache(maxsize=None)
+def parse_perms(perms):
+    """Convert a maps permission field (e.g. b'rw-p') to PERM_* bits"""
+    bits = 0
+    if b'r' in perms:
+        bits |= PERM_READ
+    if b'w' in perms:
+        bits |= PERM_WRITE
+    if b'x' in perms:
+        bits |= PERM_EXEC
+    if b's' in perms:
+        bits |= PERM_SHARED
+    return bits
+
+def format_perms(bits):
+    """Convert PERM_* bits back to the rwxp notation used by /proc/<pid>/maps"""
+    return (('r' if bits & PERM_READ else '-') +
+            ('w' if bits & PERM_WRITE else '-') +
+            ('x' if bits & PERM_EXEC else '-') +
+            ('s' if bits & PERM_SHARED else 'p'))
+
+# A readable memory region from /proc/<pid>/maps (perms holds PERM_* bits)
+Region = namedtuple('Region', ['start', 'end', 'perms', 'path'])
+
+# One readable /proc/<pid>/maps line: start-end perms offset dev inode [path].
+# Unreadable lines (e.g. ---p guard pages) are rejected inside the regex engine
+# before any per-line Python work or int() parsing.
+_MAPS_RE = re.compile(rb'^([0-9a-f]+)-([0-9a-f]+) (r\S*) ([0-9a-f]+) (\S+) (\d+)[ \t]*(.*)$', re.MULTILINE)
+
+# Same, but only [heap], [stack...] and [anon...] lines. The kernel writes these
+# names verbatim, so a case-sensitive literal prefix is enough.
+_SCANNABLE_MAPS_RE = re.compile(
+    rb'^([0-9a-f]+)-([0-9a-f]+) (r\S*) ([0-9a-f]+) (\S+) (\d+)[ \t]*(\[(?:heap\]|stack|anon).*)$',
+    re.MULTILINE
+)
+
+class iovec(ctypes.Structure):
+    """struct iovec used by process_vm_readv"""
+    _fields_ = [("iov_base", c_void_p), ("iov_len", c_size_t)]
+
+# Set proper return and argument types for process_vm_readv
+libc.process_vm_readv.argtypes = [c_int, POINTER(iovec), c_ulong, POINTER(iovec), c_ulong, c_ulong]
+libc.process_vm_readv.restype = c_ssize_t
+
 class ProcessOperations:
     """Handles process memory operations using ptrace"""
     
@@ -31,18 +92,23 @@ class ProcessOperations:
         self.misc = misc
         self.word_size = ctypes.sizeof(ctypes.c_void_p)  # Platform word size (4 or 8 bytes)
         self.attached_pid = None
+        self._mem_fd = None  # Cached /proc/<pid>/mem descriptor for the attached process
+        self._vm_readv_supported = True  # Cleared once process_vm_readv reports ENOSYS
+        self._reader = None  # Helper thread used to read the next chunk ahead of the scanner
+        self._clk_tck = os.sysconf(os.sysconf_names["SC_CLK_TCK"])  # Clock ticks per second
+        self._boot_time_cache = (0.0, None)  # (time.monotonic() when computed, boot time)
     
     def __del__(self):
-        """Destructor to automatically detach if needed"""
+        """Destructor to automatically detach and release the read-ahead resources"""
         if self.attached_pid:
             self.detach_pid()
+        self._close_mem_fd()
+        if self._reader is not None:
+            self._reader.shutdown(wait=False)
+            self._reader = None
     
     def attach_pid(self, pid):
         """Attach to a process using ptrace"""
-        if not self._pid_exists(pid):
-            self.misc.print_error(f"Process {pid} does not exist")
-            return False
-            
         try:
             # Check if we're already attached
             if self.attached_pid == pid:
@@ -56,11 +122,29 @@ class ProcessOperations:
             c_pid = pid  # Don't convert to ctypes yet, pass as int
             c_null = ctypes.c_void_p(0)
             
-            # Attach to the process
-            res = libc.ptrace(PTRACE_ATTACH, c_pid, c_null, c_null)
+            # Seize and interrupt the process: it stops without being sent a SIGSTOP, so
+            # its parent and signal state never see one. ptrace itself reports a missing
+            # process (ESRCH).
+            res = libc.ptrace(PTRACE_SEIZE, c_pid, c_null, c_null)
+            if res == -1 and ctypes.get_errno() == errno.EIO:
+                # Kernel without PTRACE_SEIZE (before 3.4)
+                res = libc.ptrace(PTRACE_ATTACH, c_pid, c_null, c_null)
+            elif res == 0:
+                res = libc.ptrace(PTRACE_INTERRUPT, c_pid, c_null, c_null)
+                if res == -1:
+                    # Don't leave the process seized if it could not be stopped
+                    err = ctypes.get_errno()
+                    libc.ptrace(PTRACE_DETACH, c_pid, c_null, c_null)
+                    ctypes.set_errno(err)
             if res == -1:
                 err = ctypes.get_errno()
-                if err != 0:  # Real error occurred
+                if err == errno.ESRCH:
+                    self.misc.print_error(f"Process {pid} does not exist")
+                    return False
+                elif err == errno.EPERM:
+                    self.misc.print_error(f"Permission denied attaching to process {pid}")
+                    return False
+                elif err != 0:  # Real error occurred
                     error_msg = os.strerror(err)
                     self.misc.print_error(f"Failed to attach to process {pid}: {error_msg}")
                     return False
@@ -70,9 +154,11 @@ class ProcessOperations:
                 status = os.waitpid(pid, 0)[1]
                 if os.WIFSTOPPED(status):
                     self.attached_pid = pid
+                    self._open_mem_fd(pid)
                     self.misc.print_verbose(f"Attached to process {pid}", self.options)
                     return True
                 else:
+                    libc.ptrace(PTRACE_DETACH, c_pid, c_null, c_null)
                     self.misc.print_error(f"Process {pid} did not stop after attach")
                     return False
             except ChildProcessError:
@@ -87,6 +173,8 @@ class ProcessOperations:
         if not self.attached_pid:
             return True
         
+        self._close_mem_fd()
+        
         try:
             # All arguments need to be properly typed for ctypes
             c_pid = self.attached_pid  # Don't convert to ctypes yet, pass as int
@@ -111,73 +199,116 @@ class ProcessOperations:
             self.attached_pid = None  # Still mark as detached
             return False
     
-    def read_word(self, addr):
-        """Read a single word from memory"""
+    def _open_mem_fd(self, pid):
+        """Open /proc/<pid>/mem once so chunk reads can use pread"""
+        self._close_mem_fd()
+        try:
+            # No O_DIRECT: procfs rejects it with EINVAL, and reads from /proc/<pid>/mem
+            # copy straight from the target's pages without going through the page cache
+            self._mem_fd = os.open(f"/proc/{pid}/mem", os.O_RDONLY)
+        except OSError as e:
+            self.misc.print_verbose(f"Could not open /proc/{pid}/mem: {e.strerror}", self.options)
+            self._mem_fd = None
+    
+    def _close_mem_fd(self):
+        """Close the cached /proc/<pid>/mem descriptor"""
+        if self._mem_fd is not None:
+            try:
+                os.close(self._mem_fd)
+            except OSError:
+                pass
+            self._mem_fd = None
+    
+    def _read_process_vm(self, addr, size):
+        """Read memory with a single process_vm_readv call
+        
+        Returns the bytes read, or raises OSError with the syscall errno.
+        """
+        buf = ctypes.create_string_buffer(size)
+        local_iov = iovec(ctypes.cast(buf, c_void_p), size)
+        remote_iov = iovec(c_void_p(addr), size)
+        
+        n = libc.process_vm_readv(self.attached_pid, ctypes.byref(local_iov), 1, ctypes.byref(remote_iov), 1, 0)
+        if n < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return ctypes.string_at(buf, n)
+    
+    def _read_proc_mem(self, addr, size):
+        """Read memory with a single pread on /proc/<pid>/mem"""
+        if self._mem_fd is None:
+            raise OSError(errno.EBADF, "/proc/<pid>/mem is not open")
+        return os.pread(self._mem_fd, size, addr)
+    
+    def _read_ptrace(self, addr, size):
+        """Read a block of memory word by word with PTRACE_PEEKDATA"""
         if not self.attached_pid:
             return None
         
-        try:
-            # All arguments need to be properly typed for ctypes
-            c_addr = ctypes.c_void_p(addr)
-            c_pid = self.attached_pid  # Pass as int
-            c_null = ctypes.c_void_p(0)
-            
-            result = libc.ptrace(PTRACE_PEEKDATA, c_pid, c_addr, c_null)
-            if result == -1:
+        # Words are stored straight into one preallocated array; c_long keeps
+        # the sign bits as they are, so no per-word conversion is needed
+        words_to_read = (size + self.word_size - 1) // self.word_size
+        buf = (c_long * words_to_read)()
+        c_pid = self.attached_pid
+        c_null = ctypes.c_void_p(0)
+        
+        words_read = 0
+        for i in range(words_to_read):
+            # PEEKDATA can return -1 as data; only a set errno marks an error
+            ctypes.set_errno(0)
+            word = libc.ptrace(PTRACE_PEEKDATA, c_pid, addr + i * self.word_size, c_null)
+            if word == -1:
                 err = ctypes.get_errno()
                 if err != 0:  # Real error occurred
-                    return None
-            return result
-        except Exception as e:
-            self.misc.print_verbose(f"Error reading memory at {hex(addr)}: {str(e)}", self.options)
+                    if words_read == 0:
+                        self.misc.print_verbose(f"Error reading memory at {hex(addr)}: {os.strerror(err)}", self.options)
+                    break
+            buf[i] = word
+            words_read += 1
+        
+        # If we got some data, return it (truncated to the requested size), otherwise None
+        if not words_read:
             return None
+        return ctypes.string_at(buf, min(words_read * self.word_size, size))
     
-    def read_bytes(self, addr, size):
-        """Read a block of memory as bytes"""
-        if not self.attached_pid:
+    def read_bytes(self, addr, size, allow_ptrace=True):
+        """Read a block of memory as bytes
+        
+        Uses the cheapest mechanism that works: pread on /proc/<pid>/mem, then
+        process_vm_readv, then (if allow_ptrace) word-by-word PTRACE_PEEKDATA.
+        Without allow_ptrace, a range only ptrace could read gives _PTRACE_NEEDED.
+        """
+        if not self.attached_pid or size <= 0:
             return None
         
-        # Allocate buffer for the data
-        data = bytearray()
+        # Fast path: one pread on the /proc/<pid>/mem fd kept open since attach_pid.
+        # pread fills the returned bytes object directly, so it copies the data once.
+        if self._mem_fd is not None:
+            try:
+                return self._read_proc_mem(addr, size) or None
+            except OSError as e:
+                if e.errno in (errno.EIO, errno.EFAULT):
+                    # Range not mapped (any more), other mechanisms won't do better
+                    self.misc.print_verbose(f"Reading /proc/{self.attached_pid}/mem failed at {hex(addr)}: {e.strerror}", self.options)
+                    return None
         
-        try:
-            # Read memory word by word
-            words_to_read = (size + self.word_size - 1) // self.word_size
-            for i in range(words_to_read):
-                try:
-                    # Calculate current address
-                    curr_addr = addr + i * self.word_size
-                    
-                    # Read word from memory
-                    word = self.read_word(curr_addr)
-                    if word is None:
-                        break
-                    
-                    # Convert the word to bytes
-                    try:
-                        # Handle negative value correctly
-                        if word < 0:
-                            # Convert to unsigned representation (2's complement)
-                            word = (1 << (self.word_size * 8)) + word
-                        word_bytes = word.to_bytes(self.word_size, byteorder='little')
-                        data.extend(word_bytes)
-                    except (OverflowError, ValueError) as e:
-                        self.misc.print_verbose(f"Error converting word to bytes at {hex(curr_addr)}: {str(e)}", self.options)
-                        break
-                except Exception as e:
-                    self.misc.print_verbose(f"Error reading memory at {hex(addr + i * self.word_size)}: {str(e)}", self.options)
-                    break
-                    
-            # If we got some data, return it, otherwise return None
-            if data:
-                # Truncate to requested size
-                return bytes(data[:size])
-            return None
-        except Exception as e:
-            self.misc.print_verbose(f"Error reading memory block at {hex(addr)}: {str(e)}", self.options)
-            return None
+        # Fallback: one process_vm_readv call for the whole block
+        if self._vm_readv_supported:
+            try:
+                return self._read_process_vm(addr, size) or None
+            except OSError as e:
+                if e.errno == errno.ENOSYS:
+                    self._vm_readv_supported = False
+                elif e.errno != errno.EPERM:
+                    self.misc.print_verbose(f"process_vm_readv failed at {hex(addr)}: {e.strerror}", self.options)
+                    return None
+        
+        # Last resort: word-by-word ptrace (only works from the tracer thread)
+        if not allow_ptrace:
+            return _PTRACE_NEEDED
+        return self._read_ptrace(addr, size)
     
-    def read_memory_region(self, start_addr, end_addr):
+    def read_memory_region(self, start_addr, end_addr, allow_ptrace=True):
         """Read a memory region"""
         size = end_addr - start_addr
         if size <= 0:
@@ -189,7 +320,66 @@ class ProcessOperations:
             self.misc.print_warning(f"Large memory region detected ({size} bytes). Limiting to {max_size} bytes.")
             size = max_size
         
-        return self.read_bytes(start_addr, size)
+        return self.read_bytes(start_addr, size, allow_ptrace)
+    
+    def _get_reader(self):
+        """Return the helper thread used for read-ahead, starting it on first use"""
+        if self._reader is None:
+            self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memsift-reader")
+        return self._reader
+    
+    def iter_memory_chunks(self, start_addr, end_addr, chunk_size):
+        """Yield (chunk_start, chunk_end, data) for each chunk of a memory region
+        
+        While the caller scans one chunk, the next one is read on a helper thread.
+        The read syscalls release the GIL, so copying memory out of the target
+        overlaps with regex matching instead of running after it.
+        """
+        chunks = [(chunk_start, min(chunk_start + chunk_size, end_addr))
+                  for chunk_start in range(start_addr, end_addr, chunk_size)]
+        
+        # Single chunk, or only ptrace left: read synchronously
+        if len(chunks) == 1 or not (self._mem_fd is not None or self._vm_readv_supported):
+            for chunk_start, chunk_end in chunks:
+                yield chunk_start, chunk_end, self.read_memory_region(chunk_start, chunk_end)
+            return
+        
+        reader = self._get_reader()
+        pending = reader.submit(self.read_memory_region, chunks[0][0], chunks[0][1], False)
+        try:
+            for i, (chunk_start, chunk_end) in enumerate(chunks):
+                data = pending.result()
+                if i + 1 < len(chunks):
+                    pending = reader.submit(self.read_memory_region, chunks[i + 1][0], chunks[i + 1][1], False)
+                if data is _PTRACE_NEEDED:
+                    # The helper thread is not the ptrace tracer, read from this thread
+                    data = self._read_ptrace(chunk_start, chunk_end - chunk_start)
+                yield chunk_start, chunk_end, data
+        finally:
+            # Don't let detach_pid close the mem fd under an in-flight read
+            pending.cancel()
+            try:
+                pending.result()
+            except Exception:
+                pass
+    
+    def _read_proc_file(self, path, bufsize=1 << 20):
+        """Read a whole /proc file with as few read() calls as possible"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            chunks = []
+            while True:
+                chunk = os.read(fd, bufsize)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                # procfs hands out at most the buffer size per read; a full read means
+                # there is probably more, so ask for more next time
+                if len(chunk) == bufsize:
+                    bufsize *= 2
+            return b''.join(chunks)
+        finally:
+            os.close(fd)
     
     def get_process_maps(self, pid):
         """Get memory maps for a process"""
@@ -197,49 +387,22 @@ class ProcessOperations:
             maps = []
             maps_path = f"/proc/{pid}/maps"
             
-            # Check if maps file exists and is readable
-            if not os.path.isfile(maps_path):
+            try:
+                data = self._read_proc_file(maps_path)
+            except FileNotFoundError:
                 self.misc.print_verbose(f"Maps file does not exist for process {pid}", self.options)
                 return []
-                
-            try:
-                with open(maps_path, "r") as f:
-                    for line in f:
-                        try:
-                            fields = line.split()
-                            if len(fields) < 5:  # Need at least address, perms, offset, dev, inode
-                                continue
-                            
-                            addr_range = fields[0].split("-")
-                            start_addr = int(addr_range[0], 16)
-                            end_addr = int(addr_range[1], 16)
-                            
-                            perms = fields[1]
-                            offset = int(fields[2], 16)
-                            dev = fields[3]
-                            inode = int(fields[4])
-                            path = " ".join(fields[5:]) if len(fields) >= 6 else ""
-                            
-                            # Only include readable regions
-                            if 'r' in perms:
-                                # Only add regions that are likely to contain data we care about
-                                if self.options.dump_all or 'heap' in path.lower() or 'stack' in path.lower() or '[anon' in path.lower():
-                                    maps.append({
-                                        'start': start_addr,
-                                        'end': end_addr,
-                                        'perms': perms,
-                                        'offset': offset,
-                                        'dev': dev,
-                                        'inode': inode,
-                                        'path': path
-                                    })
-                        except (ValueError, IndexError) as e:
-                            # Skip lines that can't be parsed
-                            self.misc.print_verbose(f"Error parsing line in maps file for process {pid}: {str(e)}", self.options)
-                            continue
             except PermissionError:
                 self.misc.print_verbose(f"Permission denied reading maps for process {pid}", self.options)
                 return []
+            
+            # Unless dump_all is set, only heap, stack and anonymous mappings are
+            # likely to contain data we care about
+            maps_re = _MAPS_RE if self.options.dump_all else _SCANNABLE_MAPS_RE
+            for m in maps_re.finditer(data):
+                # Both regexes only match readable regions
+                start_addr, end_addr, perms, _offset, _dev, _inode, path = m.groups()
+                maps.append(Region(int(start_addr, 16), int(end_addr, 16), parse_perms(perms), os.fsdecode(path)))
                 
             if not maps:
                 self.misc.print_verbose(f"No valid memory regions found for process {pid}", self.options)
@@ -249,6 +412,35 @@ class ProcessOperations:
             self.misc.print_error(f"Failed to read memory maps for process {pid}: {str(e)}")
             return []
     
+    def iter_process_maps(self, pids):
+        """Yield (pid, maps) for each PID, reading the next PID's maps ahead
+        
+        Only one PID is read ahead so the maps are still current when that
+        process is scanned.
+        """
+        pids = list(pids)
+        if not pids:
+            return
+        
+        reader = self._get_reader()
+        pending = reader.submit(self.get_process_maps, pids[0])
+        for i, pid in enumerate(pids):
+            maps = pending.result()
+            if i + 1 < len(pids):
+                pending = reader.submit(self.get_process_maps, pids[i + 1])
+            yield pid, maps
+    
+    def _get_boot_time(self):
+        """Wall-clock boot time, re-read from /proc/uptime at most once a second"""
+        cached_at, boot_time = self._boot_time_cache
+        now = time.monotonic()
+        if boot_time is None or now - cached_at > 1.0:
+            with open("/proc/uptime", "r") as uptime_f:
+                uptime = float(uptime_f.read().split()[0])
+            boot_time = time.time() - uptime
+            self._boot_time_cache = (now, boot_time)
+        return boot_time
+    
     def get_process_info(self, pid):
         """Get detailed information about a process"""
         info = {
@@ -291,13 +483,9 @@ class ProcessOperations:
                 if len(stat) >= 22:
                     # Get starttime (in clock ticks since boot)
                     starttime = int(stat[21])
-                    # Convert to seconds
-                    with open("/proc/uptime", "r") as uptime_f:
-                        uptime = float(uptime_f.read().split()[0])
-                    
                     # Calculate start time
-                    seconds_since_boot = starttime / os.sysconf(os.sysconf_names["SC_CLK_TCK"])
-                    start_time = time.time() - uptime + seconds_since_boot
+                    seconds_since_boot = starttime / self._clk_tck
+                    start_time = self._get_boot_time() + seconds_since_boot
                     info['start_time'] = self.misc.timestamp_to_readable(start_time)
             
             return info
@@ -306,44 +494,41 @@ class ProcessOperations:
             return info
     
     def enum_processes(self):
-        """Enumerate all processes on the system"""
-        pids = []
-        for entry in os.listdir("/proc"):
-            if entry.isdigit():
-                pids.append(int(entry))
-        return pids
+        """Enumerate all processes on the system (yields PIDs while /proc is being listed)"""
+        with os.scandir("/proc") as entries:
+            for entry in entries:
+                if entry.name.isdigit():
+                    yield int(entry.name)
     
     def find_processes_by_name(self, name):
         """Find processes by name (case insensitive)"""
         matching_pids = []
-        name = name.lower()  # Convert to lowercase for case-insensitive comparison
+        # /proc contents are compared as raw bytes, lowercased in C without decoding
+        name = os.fsencode(name.lower())
         
-        # Get all PIDs
-        pids = self.enum_processes()
-        
-        for pid in pids:
+        # Cheapest source first, so most processes are decided with a single small read
+        for pid in self.enum_processes():
             try:
-                # Check against cmdline
-                with open(f"/proc/{pid}/cmdline", "r") as f:
-                    cmdline = f.read().replace('\0', ' ').strip().lower()
-                    if name in cmdline:
-                        matching_pids.append(pid)
-                        continue
+                # Check against comm (process name, at most 16 bytes)
+                comm = self._read_proc_file(f"/proc/{pid}/comm", 4096).lower()
+                if name in comm:
+                    matching_pids.append(pid)
+                    continue
                 
-                # Check against comm (process name)
-                with open(f"/proc/{pid}/comm", "r") as f:
-                    comm = f.read().strip().lower()
-                    if name in comm:
-                        matching_pids.append(pid)
-                        continue
+                # Check against cmdline
+                cmdline = self._read_proc_file(f"/proc/{pid}/cmdline", 4096).replace(b'\0', b' ').lower()
+                if name in cmdline:
+                    matching_pids.append(pid)
+                    continue
                 
-                # Check against executable name (symlink target)
+                # Check against executable name (symlink target, no further resolution needed)
                 try:
-                    exe_path = os.path.realpath(f"/proc/{pid}/exe")
+                    exe_path = os.readlink(f"/proc/{pid}/exe".encode())
                     exe_name = os.path.basename(exe_path).lower()
                     if name in exe_name:
                         matching_pids.append(pid)
-                except (FileNotFoundError, PermissionError):
+                except OSError:
+                    # Kernel threads have no exe link, other users' processes deny it
                     pass
                     
             except (FileNotFoundError, PermissionError, ProcessLookupError):
@@ -351,7 +536,3 @@ class ProcessOperations:
                 continue
         
         return matching_pids
-    
-    def _pid_exists(self, pid):
-        """Check if a process exists"""
-        return os.path.exists(f"/proc/{pid}")
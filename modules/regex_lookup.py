@@ -4,6 +4,284 @@
 import re
 import os
 import sys
+import pwd
+import stat
+import hashlib
+import functools
+import unicodedata
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# Hyperscan is optional; without it every pattern is run through re
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# google-re2 is optional; its linear-time matcher cannot backtrack catastrophically
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+def _hs_cache_dir():
+    """Cache directory in the effective user's home
+    
+    Looked up in the passwd database rather than $HOME, which sudo may leave
+    pointing at the invoking user's home.
+    """
+    try:
+        home = pwd.getpwuid(os.geteuid()).pw_dir
+    except KeyError:
+        home = os.path.expanduser("~")
+    return os.path.join(home, ".cache", "memsift")
+
+def _is_private(st):
+    """True if a stat result is owned by the effective user and nobody else can write to it"""
+    return st.st_uid == os.geteuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+def _is_private_dir(path):
+    """True if path is a real directory (not a symlink) that only the effective user can write to"""
+    st = os.lstat(path)
+    return stat.S_ISDIR(st.st_mode) and _is_private(st)
+
+# Serialized Hyperscan databases, keyed by a hash of the patterns they contain
+HS_CACHE_DIR = _hs_cache_dir()
+
+# Bytes outside the printable ASCII range, removed from matches before storing them
+_NON_PRINTABLE = bytes(b for b in range(256) if not 32 <= b <= 126)
+
+# on_match fires each time this many new unique results have been found
+MATCH_EVENT_INTERVAL = 100
+
+if re2 is not None:
+    # Latin-1 so every byte matches like it does in re (UTF-8 would skip invalid sequences)
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.encoding = re2.Options.Encoding.LATIN1
+    _RE2_OPTIONS.log_errors = False
+
+def _python_only_syntax(pattern):
+    """True if pattern uses re syntax that re2 and Hyperscan read differently
+    
+    {,n} means {0,n} to re but is a literal to the others, and [[:alpha:]] is a
+    POSIX class to them but a plain set of characters to re.
+    """
+    return b'{,' in pattern or b'[:' in pattern
+
+def _parsed_ops(items):
+    """Yield every (op, av) of a parsed pattern, including those in groups, repeats, branches and classes"""
+    for op, av in items:
+        yield op, av
+        if op is sre_constants.IN:
+            yield from av
+            continue
+        for arg in (av if isinstance(av, (list, tuple)) else ()):
+            for sub in (arg if isinstance(arg, list) else [arg]):  # BRANCH holds a list of alternatives
+                if isinstance(sub, sre_parse.SubPattern):
+                    yield from _parsed_ops(sub)
+
+def _same_in_re2(pattern):
+    """True if re2 matches pattern exactly like re does"""
+    if _python_only_syntax(pattern):
+        return False
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return False
+    
+    for op, av in _parsed_ops(parsed):
+        # In re, $ also matches before a trailing newline
+        if op is sre_constants.AT and av is sre_constants.AT_END:
+            return False
+        # In re, \s and \S count \v as whitespace
+        if op is sre_constants.CATEGORY and av in (sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_SPACE):
+            return False
+    return True
+
+@functools.lru_cache(maxsize=4096)
+def _compile_pattern(pattern):
+    """Compile a bytes pattern with re2 if available and equivalent, otherwise with re
+    
+    Cached like _compile, so reloading the same patterns is a dict lookup with either engine.
+    """
+    if re2 is not None and _same_in_re2(pattern):
+        try:
+            return re2.compile(pattern, _RE2_OPTIONS)
+        except re2.error:
+            # Lookarounds, backreferences, ... are only supported by re
+            pass
+    return _compile(pattern)
+
+@functools.lru_cache(maxsize=4096)
+def _compile(pattern, flags=0):
+    """Compile a regex once per process; repeat loads are a dict lookup"""
+    return re.compile(pattern, flags)
+
+# Byte classes for the \d, \w and \s escapes of bytes patterns
+_CATEGORY_BYTES = {
+    sre_constants.CATEGORY_DIGIT: frozenset(b'0123456789'),
+    sre_constants.CATEGORY_WORD: frozenset(b'0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_'),
+    sre_constants.CATEGORY_SPACE: frozenset(b' \t\n\r\f\v'),
+}
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, 'POSSESSIVE_REPEAT', None)}
+_ZERO_WIDTH = {sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT}
+
+def _with_case(byte_set, ignorecase):
+    """Add the other case of ASCII letters when matching case-insensitively"""
+    if ignorecase:
+        byte_set = byte_set | set(bytes(byte_set).swapcase())
+    return byte_set
+
+def _class_first_bytes(items, ignorecase):
+    """Bytes matched by a parsed [...] class, or None if it is negated or unknown"""
+    first = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            first.add(av)
+        elif op is sre_constants.RANGE:
+            first.update(range(av[0], av[1] + 1))
+        elif op is sre_constants.CATEGORY and av in _CATEGORY_BYTES:
+            first |= _CATEGORY_BYTES[av]
+        else:
+            return None
+    return _with_case(first, ignorecase)
+
+def _parsed_first_bytes(items, ignorecase):
+    """Possible first bytes of a parsed pattern and whether it can match empty
+    
+    The byte set is None when any byte may start a match.
+    """
+    first = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            return first | _with_case({av}, ignorecase), False
+        elif op is sre_constants.IN:
+            byte_set = _class_first_bytes(av, ignorecase)
+            if byte_set is None:
+                return None, False
+            return first | byte_set, False
+        elif op in _ZERO_WIDTH:
+            # Anchors and lookarounds consume nothing; skipping them only widens the set
+            continue
+        
+        if op is sre_constants.BRANCH:
+            branches = [_parsed_first_bytes(branch, ignorecase) for branch in av[1]]
+        elif op is sre_constants.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            sub_ignorecase = (ignorecase or add_flags & re.IGNORECASE) and not del_flags & re.IGNORECASE
+            branches = [_parsed_first_bytes(sub, sub_ignorecase)]
+        elif op in _REPEATS:
+            min_count, max_count, sub = av
+            byte_set, nullable = _parsed_first_bytes(sub, ignorecase)
+            branches = [(byte_set, nullable or min_count == 0)]
+        else:
+            return None, False
+        
+        nullable = False
+        for byte_set, branch_nullable in branches:
+            if byte_set is None:
+                return None, False
+            first |= byte_set
+            nullable = nullable or branch_nullable
+        if not nullable:
+            return first, False
+    
+    return first, True
+
+@functools.lru_cache(maxsize=4096)
+def _first_byte_filter(pattern):
+    """Compiled class of the bytes a match of pattern can start with
+    
+    Returns None when the class would not rule anything out. A buffer that
+    contains none of these bytes cannot match, and searching for a single class
+    is far cheaper than running a pattern with lookarounds or alternations.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+        # The parser state is .state from Python 3.8 on, .pattern before that
+        flags = (getattr(parsed, 'state', None) or parsed.pattern).flags
+        first, nullable = _parsed_first_bytes(parsed, flags & re.IGNORECASE)
+    except (re.error, RecursionError, AttributeError):
+        return None
+    
+    if first is None or nullable or len(first) == 256:
+        return None
+    return _compile_pattern(b'[' + b''.join(re.escape(bytes([b])) for b in sorted(first)) + b']')
+
+# \uXXXX, \UXXXXXXXX and \N{name}; any other escape is matched so that an escaped backslash is skipped
+_UNICODE_ESCAPE = re.compile(r'\\(?:u([0-9a-fA-F]{4})|U([0-9a-fA-F]{8})|N\{([^}]*)\}|.)', re.DOTALL)
+
+def _expand_unicode_escape(match):
+    """Replace one Unicode escape with the (escaped) character it names"""
+    code, long_code, name = match.groups()
+    if code or long_code:
+        char = chr(int(code or long_code, 16))
+    elif name is not None:
+        char = unicodedata.lookup(name)
+    else:
+        return match.group()
+    return re.escape(char)
+
+def _encode_pattern(pattern):
+    """Encode a pattern as bytes, one byte per character where possible
+    
+    Bytes patterns have no \\u, \\U or \\N{...} escapes, so these are first
+    replaced with the characters they stand for; the pattern is compiled as a
+    str regex beforehand so malformed escapes raise re's own error. Latin-1
+    keeps character classes like [\xe9] byte-for-byte, the same mapping
+    search_regex uses for str input. Characters beyond U+00FF fall back to UTF-8.
+    """
+    if '\\' in pattern:
+        re.compile(pattern)
+        pattern = _UNICODE_ESCAPE.sub(_expand_unicode_escape, pattern)
+    try:
+        return pattern.encode('latin-1')
+    except UnicodeEncodeError:
+        return pattern.encode('utf-8')
+
+def _decode_match(match):
+    """Convert a bytes match to printable text"""
+    if isinstance(match, tuple):  # If the pattern has groups
+        match = b''.join(match)
+    return match.translate(None, _NON_PRINTABLE).decode('ascii')
+
+# Runs of at least four printable ASCII characters stored as UTF-16LE (each followed by a NUL)
+_UTF16_RUN = _compile_pattern(rb'(?:[\x20-\x7e]\x00){4,}')
+
+def _utf16_text(data):
+    """Printable UTF-16LE strings found in data, narrowed to one byte per character
+    
+    Runs are joined with newlines, which no run contains, so they can be scanned
+    in one pass; _findall_in_runs keeps matches from spanning two of them.
+    """
+    runs = _UTF16_RUN.findall(data)
+    if not runs:
+        return b''
+    return b'\n'.join(runs).translate(None, b'\x00')
+
+def _findall_in_runs(pattern, text):
+    """pattern.findall over newline-joined runs without matches that span two runs
+    
+    Patterns such as \\s can match the separator itself, so the joined text is
+    searched first and, only if some match crosses a newline, each run is
+    searched on its own instead.
+    """
+    found = []
+    for match in pattern.finditer(text):
+        if b'\n' in match.group():
+            return [m for run in text.split(b'\n') for m in pattern.findall(run)]
+        found.append(match)
+    
+    # Same shape as findall: whole match, the only group, or a tuple of groups
+    if pattern.groups == 0:
+        return [match.group() for match in found]
+    if pattern.groups == 1:
+        return [match.group(1) or b'' for match in found]
+    return [match.groups(b'') for match in found]
 
 class RegexLookup:
     """Handles regex pattern loading and matching for mXtract"""
@@ -14,8 +292,13 @@ class RegexLookup:
         self.patterns = []
         self.pattern_names = []
         self.results = {}  # Dictionary to store unique results for each pattern
+        self.match_count = 0  # Number of unique results, kept in step with self.results
+        self.on_match = None  # Called with match_count every MATCH_EVENT_INTERVAL new results
+        self._hs_db = None  # Hyperscan database of all patterns (prefilter)
+        self._hs_unsupported = []  # Indices of patterns Hyperscan could not compile
+        self._first_byte_filters = []  # Per pattern: class of bytes a match can start with, or None
     
-    def load_patterns(self):
+    def load_patterns(self, quiet=False):
         """Load regex patterns from specified file or default file"""
         regex_file = self.options.regex_file or self.options.default_regex_file
         
@@ -39,7 +322,13 @@ class RegexLookup:
                     if ':' in line:
                         name, pattern = line.split(':', 1)
                         try:
-                            compiled_pattern = re.compile(pattern)
+                            encoded_pattern = _encode_pattern(pattern)
+                        except re.error as e:
+                            print(f"[!] Invalid regex pattern {name}: {e}")
+                            continue
+                        try:
+                            # Patterns are compiled as bytes so raw memory can be scanned without decoding
+                            compiled_pattern = _compile_pattern(encoded_pattern)
                             self.patterns.append(compiled_pattern)
                             self.pattern_names.append(name)
                             # Initialize results dictionary for this pattern
@@ -51,11 +340,144 @@ class RegexLookup:
             if not self.options.regex_file:
                 self._create_default_patterns()
                 # Try loading again
-                self.load_patterns()
+                self.load_patterns(quiet)
             else:
                 sys.exit(1)
         
-        print(f"[*] Loaded {len(self.patterns)} regex patterns")
+        self._first_byte_filters = [_first_byte_filter(pattern.pattern) for pattern in self.patterns]
+        self._build_hyperscan_db()
+        if not quiet:
+            print(f"[*] Loaded {len(self.patterns)} regex patterns")
+    
+    def _build_hyperscan_db(self):
+        """Compile all patterns into one Hyperscan database
+        
+        The database is only used to find out which patterns occur in a buffer
+        (one linear pass for all of them); matches are still extracted with re so
+        results are identical with or without Hyperscan.
+        """
+        self._hs_db = None
+        self._hs_unsupported = []
+        if hyperscan is None or not self.patterns:
+            return
+        
+        flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_PREFILTER
+        
+        # Hyperscan would read these differently and could report no hit where re matches
+        supported = []
+        for i, pattern in enumerate(self.patterns):
+            if _python_only_syntax(pattern.pattern):
+                self._hs_unsupported.append(i)
+            else:
+                supported.append(i)
+        if not supported:
+            return
+        
+        # Reuse the database compiled by a previous run with the same patterns
+        cache_path = self._hyperscan_cache_path(flags)
+        db = self._load_hyperscan_cache(cache_path)
+        if db is not None:
+            self._hs_db = db
+            return
+        
+        try:
+            db = self._compile_hyperscan(supported, flags)
+            self._save_hyperscan_cache(cache_path, db)
+        except hyperscan.error:
+            # Find the patterns Hyperscan rejects and always run those through re
+            candidates, supported = supported, []
+            for i in candidates:
+                try:
+                    self._compile_hyperscan([i], flags)
+                    supported.append(i)
+                except hyperscan.error:
+                    self._hs_unsupported.append(i)
+            if not supported:
+                return
+            db = self._compile_hyperscan(supported, flags)
+        
+        self._hs_db = db
+    
+    def _compile_hyperscan(self, indices, flags):
+        """Compile the given patterns into a block-mode Hyperscan database"""
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[self.patterns[i].pattern for i in indices],
+            ids=indices,
+            elements=len(indices),
+            flags=[flags] * len(indices)
+        )
+        return db
+    
+    def _hyperscan_cache_path(self, flags):
+        """Path of the cached database for the currently loaded patterns"""
+        digest = hashlib.sha256(str(flags).encode())
+        for pattern in self.patterns:
+            digest.update(b"\0" + pattern.pattern)
+        return os.path.join(HS_CACHE_DIR, f"{digest.hexdigest()}.hsdb")
+    
+    def _load_hyperscan_cache(self, cache_path):
+        """Load a serialized database, or return None if missing, stale or not trusted"""
+        try:
+            # memsift runs as root; only load databases nobody else could have planted
+            if not _is_private_dir(os.path.dirname(cache_path)):
+                return None
+            
+            with open(os.open(cache_path, os.O_RDONLY | os.O_NOFOLLOW), 'rb') as f:
+                if not _is_private(os.fstat(f.fileno())):
+                    return None
+                db = hyperscan.loadb(f.read(), hyperscan.HS_MODE_BLOCK)
+            # Deserialized databases come without scratch space
+            db.scratch = hyperscan.Scratch(db)
+            return db
+        except (OSError, hyperscan.error):
+            return None
+    
+    def _save_hyperscan_cache(self, cache_path, db):
+        """Serialize a compiled database so later runs can skip compilation"""
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            if not _is_private_dir(cache_dir):
+                return
+            with open(cache_path, 'wb') as f:
+                f.write(hyperscan.dumpb(db))
+        except OSError:
+            # Caching is best effort
+            pass
+    
+    def _candidate_patterns(self, data):
+        """Return the indices of patterns that may match the given data"""
+        if self._hs_db is None:
+            return self._filter_first_bytes(range(len(self.patterns)), data)
+        
+        hits = set(self._filter_first_bytes(self._hs_unsupported, data))
+        total = len(self.patterns)
+        
+        def on_match(pattern_id, start, end, flags, context):
+            hits.add(pattern_id)
+            # Stop scanning once every pattern is known to occur
+            return len(hits) == total
+        
+        try:
+            self._hs_db.scan(data, match_event_handler=on_match)
+        except hyperscan.ScanTerminated:
+            pass
+        return sorted(hits)
+    
+    def _filter_first_bytes(self, indices, data):
+        """Drop patterns whose possible first bytes do not occur in the data"""
+        present = {}  # Patterns often share a class (e.g. digits); search each one once
+        candidates = []
+        for i in indices:
+            first_bytes = self._first_byte_filters[i]
+            if first_bytes is not None:
+                if first_bytes.pattern not in present:
+                    present[first_bytes.pattern] = first_bytes.search(data) is not None
+                if not present[first_bytes.pattern]:
+                    continue
+            candidates.append(i)
+        return candidates
     
     def _create_default_patterns(self):
         """Create default regex patterns file"""
@@ -71,7 +493,7 @@ class RegexLookup:
             "aws_secret:[0-9a-zA-Z/+]{40}",
             "",
             "# Network",
-            "ipv4:(?<![0-9])(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)(?![0-9])",
+            "ipv4:\\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\\b",
             "email:[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}",
             "url:https?://(?:[-\\w.]|(?:%[\\da-fA-F]{2}))+[^\\s]*",
             "",
@@ -95,49 +517,72 @@ class RegexLookup:
             print(f"[!] Error creating default regex patterns file: {str(e)}")
             sys.exit(1)
     
+    def _add_result(self, pattern_name, match, process_info):
+        """Record a match; returns False if it was already known"""
+        matches = self.results[pattern_name]
+        size = len(matches)
+        matches.add((match, process_info))
+        if len(matches) == size:
+            return False
+        
+        self.match_count += 1
+        if self.on_match is not None and self.match_count % MATCH_EVENT_INTERVAL == 0:
+            self.on_match(self.match_count)
+        return True
+    
     def search_regex(self, data, process_info=""):
-        """Apply all loaded regex patterns to the given data"""
+        """Apply all loaded regex patterns to the given bytes"""
         if not data:
             return
         
-        for i, pattern in enumerate(self.patterns):
-            pattern_name = self.pattern_names[i]
-            matches = pattern.findall(data)
-            
-            # Add unique matches to results
-            for match in matches:
-                if isinstance(match, tuple):  # If the pattern has groups
-                    match = ''.join(match)
+        if isinstance(data, str):
+            data = data.encode('latin-1', errors='ignore')
+        
+        # Scan the bytes as they are, then any UTF-16LE strings they hold
+        for view, findall in ((data, None), (_utf16_text(data), _findall_in_runs)):
+            if not view:
+                continue
+            for i in self._candidate_patterns(view):
+                pattern = self.patterns[i]
+                pattern_name = self.pattern_names[i]
+                matches = pattern.findall(view) if findall is None else findall(pattern, view)
                 
-                # Only add non-empty matches
-                if match and len(match) > 3:  # Minimum reasonable length
-                    self.results[pattern_name].add((match, process_info))
+                # Add unique matches to results
+                for match in matches:
+                    match = _decode_match(match)
+                    
+                    # Only add non-empty matches
+                    if match and len(match) > 3:  # Minimum reasonable length
+                        self._add_result(pattern_name, match, process_info)
     
     def search_regex_with_details(self, data, process_info=""):
-        """Apply all loaded regex patterns and return detailed findings"""
+        """Apply all loaded regex patterns to the given bytes and return (pattern_name, match) findings"""
         if not data:
             return []
         
+        if isinstance(data, str):
+            data = data.encode('latin-1', errors='ignore')
+        
         findings = []
-        for i, pattern in enumerate(self.patterns):
-            pattern_name = self.pattern_names[i]
-            matches = pattern.findall(data)
-            
-            # Add unique matches to results and return findings
-            for match in matches:
-                if isinstance(match, tuple):  # If the pattern has groups
-                    match = ''.join(match)
+        # Scan the bytes as they are, then any UTF-16LE strings they hold
+        for view, findall in ((data, None), (_utf16_text(data), _findall_in_runs)):
+            if not view:
+                continue
+            for i in self._candidate_patterns(view):
+                pattern = self.patterns[i]
+                pattern_name = self.pattern_names[i]
+                matches = pattern.findall(view) if findall is None else findall(pattern, view)
                 
-                # Only add non-empty matches
-                if match and len(match) > 3:  # Minimum reasonable length
-                    self.results[pattern_name].add((match, process_info))
+                # Add unique matches to results and return findings
+                for match in matches:
+                    match = _decode_match(match)
                     
-                    # Add to findings list
-                    findings.append({
-                        'pattern': pattern_name,
-                        'match': match,
-                        'process_info': process_info
-                    })
+                    # Only add non-empty matches
+                    if match and len(match) > 3:  # Minimum reasonable length
+                        self._add_result(pattern_name, match, process_info)
+                        
+                        # Add to findings list
+                        findings.append((pattern_name, match))
         
         return findings
     
@@ -154,6 +599,23 @@ class RegexLookup:
                 })
         return all_results
     
+    def reset_results(self):
+        """Forget all results collected so far"""
+        self.results = {name: set() for name in self.pattern_names}
+        self.match_count = 0
+    
+    def merge_results(self, results):
+        """Merge results collected by another RegexLookup (e.g. a worker process)"""
+        before = self.match_count
+        for pattern_name, matches in results.items():
+            merged = self.results.setdefault(pattern_name, set())
+            size = len(merged)
+            merged.update(matches)
+            self.match_count += len(merged) - size
+        
+        if self.on_match is not None and self.match_count // MATCH_EVENT_INTERVAL > before // MATCH_EVENT_INTERVAL:
+            self.on_match(self.match_count)
+    
     def get_result_count(self):
         """Get total number of unique results"""
-        return sum(len(matches) for matches in self.results.values())
+        return self.match_count
@@ -2,10 +2,27 @@
 # Timeline tracking for process memory analysis
 
 import time
+import collections
 import datetime
+import gzip
 import json
 import os
-from collections import defaultdict
+import sys
+
+# Jinja2 is optional; it is only needed for the HTML timeline
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+# orjson is optional; it encodes straight to UTF-8 bytes several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# One recorded finding; the owning pid is the key it is stored under
+Finding = collections.namedtuple('Finding', 'timestamp pattern_type match_data memory_region')
 
 class TimelineTracker:
     """Tracks and visualizes the timeline of sensitive data in process memory"""
@@ -14,25 +31,40 @@ class TimelineTracker:
         """Initialize with options and misc utilities"""
         self.options = options
         self.misc = misc
-        self.timeline_data = defaultdict(lambda: defaultdict(list))
+        self._timeline_data = {}  # pid -> pattern type -> list of findings
+        self._events = []  # Findings recorded since the last grouping, as flat tuples
+        self._pattern_types = set()  # Every pattern type seen, kept up to date while grouping
         self.start_time = time.time()
         self.scan_intervals = []
+        self._time_human_cache = {}  # Whole second -> formatted time; findings share seconds
     
     def record_finding(self, timestamp, pid, pattern_type, match_data, memory_region=None):
         """Record a sensitive data finding with timestamp"""
-        process_key = str(pid)
-        
-        # Create the finding record
-        finding = {
-            'timestamp': timestamp,
-            'relative_time': timestamp - self.start_time,
-            'pattern_type': pattern_type,
-            'match_data': match_data,
-            'memory_region': memory_region
-        }
+        # Only buffer the event here; grouping by process and pattern is deferred
+        # until the timeline is read, so the scan loop pays for a single append
+        self._events.append((pid, pattern_type, timestamp, match_data, memory_region))
+    
+    @property
+    def timeline_data(self):
+        """Findings grouped as pid -> pattern type -> list of findings"""
+        self._group_events()
+        return self._timeline_data
+    
+    def _group_events(self):
+        """Move buffered findings into the grouped timeline data and the pattern type set"""
+        if not self._events:
+            return
         
-        # Add to the timeline data
-        self.timeline_data[process_key][pattern_type].append(finding)
+        timeline_data = self._timeline_data
+        add_pattern_type = self._pattern_types.add
+        intern = sys.intern
+        for pid, pattern_type, timestamp, match_data, memory_region in self._events:
+            # There are only a few dozen pattern types, so every finding shares one copy
+            pattern_type = intern(pattern_type)
+            add_pattern_type(pattern_type)
+            timeline_data.setdefault(str(pid), {}).setdefault(pattern_type, []).append(
+                Finding(timestamp, pattern_type, match_data, memory_region))
+        self._events = []
     
     def record_scan_interval(self, start_time, end_time, process_id=None, scan_type=None):
         """Record when a scan occurred"""
@@ -48,16 +80,30 @@ class TimelineTracker:
         """Save timeline data to a JSON file"""
         try:
             output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
             
-            # Convert defaultdict to regular dict for JSON serialization
+            # relative_time is not stored per finding; it is derived here so the
+            # saved format is unchanged
+            start_time = self.start_time
             serializable_data = {
                 'timeline_data': {
-                    pid: dict(pattern_dict) 
-                    for pid, pattern_dict in self.timeline_data.items()
+                    pid: {
+                        pattern_type: [
+                            {
+                                'timestamp': finding.timestamp,
+                                'relative_time': finding.timestamp - start_time,
+                                'pattern_type': finding.pattern_type,
+                                'match_data': finding.match_data,
+                                'memory_region': finding.memory_region
+                            }
+                            for finding in findings
+                        ]
+                        for pattern_type, findings in pid_data.items()
+                    }
+                    for pid, pid_data in self.timeline_data.items()
                 },
-                'start_time': self.start_time,
+                'start_time': start_time,
                 'end_time': time.time(),
                 'scan_intervals': self.scan_intervals,
                 'metadata': {
@@ -67,8 +113,18 @@ class TimelineTracker:
                 }
             }
             
-            with open(output_path, 'w') as f:
-                json.dump(serializable_data, f, indent=2)
+            # Encode in one call and write once; indentation only on request since
+            # it multiplies the file size for large timelines
+            content = self._dumps_bytes(serializable_data)
+            
+            # Timelines are very repetitive; a .gz path gets them compressed (level 1
+            # already shrinks them many times over at little CPU cost)
+            if output_path.endswith('.gz'):
+                with gzip.open(output_path, 'wb', compresslevel=1) as f:
+                    f.write(content)
+            else:
+                with open(output_path, 'wb', buffering=1 << 16) as f:
+                    f.write(content)
                 
             self.misc.print_success(f"Timeline data saved to {output_path}")
             return True
@@ -76,67 +132,103 @@ class TimelineTracker:
             self.misc.print_error(f"Error saving timeline data: {str(e)}")
             return False
     
+    def _dumps_bytes(self, data):
+        """Encode data as UTF-8 JSON, indented only if pretty_json is set"""
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if self.options.pretty_json else 0)
+        if self.options.pretty_json:
+            return json.dumps(data, indent=2).encode('utf-8')
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+    
     def generate_html_timeline(self, output_path):
         """Generate an HTML visualization of the timeline"""
+        # Without findings there is nothing to plot; skip formatting and Jinja2 entirely
+        if not self.timeline_data:
+            return self._write_empty_timeline(output_path)
+        
+        if _TEMPLATE is None:
+            self.misc.print_error("Jinja2 library required for HTML timeline generation. Install with: pip install jinja2")
+            return False
+        
         try:
-            from jinja2 import Template
-            
             # Convert timestamps to human-readable format and add color information
-            formatted_data, pattern_colors = self._format_timeline_for_display()
-            
-            # Create HTML using Jinja2 template
-            template_str = self._get_html_template()
-            template = Template(template_str)
+            formatted_data, pattern_colors, tooltips = self._format_timeline_for_display()
             
-            html_content = template.render(
+            # Stream the rendered HTML instead of building the whole document as one string
+            html_stream = _TEMPLATE.stream(
                 timeline_data=formatted_data,
                 pattern_colors=pattern_colors,
                 pids=list(self.timeline_data.keys()),
                 pattern_types=self._get_all_pattern_types(),
                 start_time=datetime.datetime.fromtimestamp(self.start_time).strftime('%Y-%m-%d %H:%M:%S'),
                 end_time=datetime.datetime.fromtimestamp(time.time()).strftime('%Y-%m-%d %H:%M:%S'),
-                scan_intervals=self._format_scan_intervals()
+                scan_intervals=self._format_scan_intervals(),
+                tooltips=tooltips
             )
             
             # Write HTML to file
             output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
                 
-            with open(output_path, 'w') as f:
-                f.write(html_content)
+            with open(output_path, 'wb', buffering=1 << 16) as f:
+                html_stream.enable_buffering(64)  # Join small template chunks before each write
+                html_stream.dump(f, encoding='utf-8')
                 
             self.misc.print_success(f"HTML timeline visualization saved to {output_path}")
             return True
-        except ImportError:
-            self.misc.print_error("Jinja2 library required for HTML timeline generation. Install with: pip install jinja2")
+        except Exception as e:
+            self.misc.print_error(f"Error generating HTML timeline: {str(e)}")
             return False
+    
+    def _write_empty_timeline(self, output_path):
+        """Write the fixed page used when no sensitive data was found"""
+        try:
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(_EMPTY_TIMELINE_HTML)
+            
+            self.misc.print_success(f"HTML timeline visualization saved to {output_path} (no findings)")
+            return True
         except Exception as e:
             self.misc.print_error(f"Error generating HTML timeline: {str(e)}")
             return False
     
     def _get_all_pattern_types(self):
         """Get a list of all pattern types found across all processes"""
-        pattern_types = set()
-        for pid_data in self.timeline_data.values():
-            pattern_types.update(pid_data.keys())
-        return sorted(list(pattern_types))
+        self._group_events()
+        return sorted(self._pattern_types)
     
+    def _time_human(self, timestamp):
+        """Format a timestamp as local time, at most once per distinct second"""
+        second = int(timestamp)
+        time_human = self._time_human_cache.get(second)
+        if time_human is None:
+            time_human = datetime.datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+            self._time_human_cache[second] = time_human
+        return time_human
     
+    def _timeline_span(self):
+        """Seconds from the first scan's start to the last scan's end (None without scans)"""
+        if not self.scan_intervals:
+            return None
+        return (self.scan_intervals[-1]['end_time'] - self.scan_intervals[0]['start_time']) or 1.0
     
     def _format_scan_intervals(self):
         """Format scan intervals for display"""
         formatted_intervals = []
+        span = self._timeline_span()
         
         for interval in self.scan_intervals:
             formatted = interval.copy()
-            formatted['start_time_human'] = datetime.datetime.fromtimestamp(
-                interval['start_time']
-            ).strftime('%Y-%m-%d %H:%M:%S')
-            formatted['end_time_human'] = datetime.datetime.fromtimestamp(
-                interval['end_time']
-            ).strftime('%Y-%m-%d %H:%M:%S')
+            formatted['start_time_human'] = self._time_human(interval['start_time'])
+            formatted['end_time_human'] = self._time_human(interval['end_time'])
             formatted['duration_human'] = f"{interval['duration']:.2f}s"
+            # Marker position on the timeline, as a percentage of the whole scan span
+            formatted['left_pct'] = (interval['start_time'] - self.scan_intervals[0]['start_time']) / span * 100
             
             formatted_intervals.append(formatted)
             
@@ -146,6 +238,7 @@ class TimelineTracker:
         """Format timeline data for visualization with color information"""
         formatted_data = {}
         pattern_colors = {}
+        tooltips = []  # (pattern type, time, match, region) per finding, looked up by its idx
         
         # Pre-defined color palette
         colors = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', 
@@ -157,30 +250,40 @@ class TimelineTracker:
         for i, pattern_type in enumerate(pattern_types):
             pattern_colors[pattern_type] = colors[i % len(colors)]
         
-        # Format the timeline data
+        # Format the timeline data (lookups that don't depend on the finding are kept out of the inner loop)
+        time_human = self._time_human
+        start_time = self.start_time
+        span = self._timeline_span() or 1.0
+        add_tooltip = tooltips.append
         for pid, pid_data in self.timeline_data.items():
             formatted_data[pid] = {}
             
             for pattern_type, findings in pid_data.items():
-                formatted_data[pid][pattern_type] = []
+                color = pattern_colors[pattern_type]
+                formatted_findings = formatted_data[pid][pattern_type] = []
+                append = formatted_findings.append
                 
                 for finding in findings:
-                    # Create a copy with human-readable time
-                    finding_copy = finding.copy()
-                    finding_copy['time_human'] = datetime.datetime.fromtimestamp(
-                        finding['timestamp']
-                    ).strftime('%Y-%m-%d %H:%M:%S')
-                    finding_copy['relative_time_human'] = f"{finding['relative_time']:.2f}s"
-                    finding_copy['pattern_type'] = pattern_type  # Add pattern type to finding
-                    finding_copy['color'] = pattern_colors[pattern_type]  # Add color to finding
-                    
-                    formatted_data[pid][pattern_type].append(finding_copy)
+                    # Build only the fields the template uses, with human-readable times
+                    timestamp = finding.timestamp
+                    relative_time = timestamp - start_time
+                    formatted_time = time_human(timestamp)
+                    append({
+                        'idx': len(tooltips),
+                        'time_human': formatted_time,
+                        'left_pct': relative_time / span * 100,
+                        'relative_time_human': f"{relative_time:.2f}s",
+                        'color': color,
+                        'match_data': finding.match_data,
+                        'memory_region': finding.memory_region,
+                    })
+                    add_tooltip((pattern_type, formatted_time, finding.match_data, finding.memory_region))
         
-        return formatted_data, pattern_colors
+        return formatted_data, pattern_colors, tooltips
 
-    def _get_html_template(self):
-        """Return HTML template for timeline visualization"""
-        return '''<!DOCTYPE html>
+
+# HTML template for the timeline visualization, compiled once at import when Jinja2 is available
+_TEMPLATE_SRC = '''<!DOCTYPE html>
     <html>
     <head>
         <title>MemSift Memory Timeline Visualization</title>
@@ -337,10 +440,10 @@ class TimelineTracker:
                             {% if pattern_type in timeline_data[pid] %}
                                 {% for finding in timeline_data[pid][pattern_type] %}
                                     <div class="timeline-event" 
-                                        style="left: {{ (finding.relative_time / (scan_intervals[-1].end_time - scan_intervals[0].start_time)) * 100 }}%; 
+                                        style="left: {{ finding.left_pct }}%; 
                                                 width: 10px;
                                                 background-color: {{ finding.color }}"
-                                        data-finding="{{ finding | tojson }}">
+                                        data-idx="{{ finding.idx }}">
                                     </div>
                                 {% endfor %}
                             {% endif %}
@@ -348,7 +451,7 @@ class TimelineTracker:
                         
                         {% for interval in scan_intervals %}
                             {% if interval.process_id == pid or interval.process_id is none %}
-                                <div class="scan-marker" style="left: {{ (interval.start_time - scan_intervals[0].start_time) / (scan_intervals[-1].end_time - scan_intervals[0].start_time) * 100 }}%"
+                                <div class="scan-marker" style="left: {{ interval.left_pct }}%"
                                     title="Scan at {{ interval.start_time_human }}"></div>
                             {% endif %}
                         {% endfor %}
@@ -375,8 +478,8 @@ class TimelineTracker:
                                 <tr>
                                     <td>{{ finding.time_human }}<br><small>(+{{ finding.relative_time_human }})</small></td>
                                     <td><span class="pattern-badge" style="background-color: {{ finding.color }}">{{ pattern_type }}</span></td>
-                                    <td>{{ finding.match_data }}</td>
-                                    <td>{{ finding.memory_region or 'N/A' }}</td>
+                                    <td>{{ finding.match_data | e }}</td>
+                                    <td>{{ (finding.memory_region or 'N/A') | e }}</td>
                                 </tr>
                             {% endfor %}
                         {% endif %}
@@ -389,6 +492,9 @@ class TimelineTracker:
         <div id="tooltip" class="tooltip"></div>
         
         <script>
+            // Tooltip data for every timeline event, indexed by its data-idx
+            const FINDINGS = {{ tooltips | tojson }};
+            
             // Add interactive tooltip functionality
             document.addEventListener('DOMContentLoaded', function() {
                 const tooltip = document.getElementById('tooltip');
@@ -396,14 +502,19 @@ class TimelineTracker:
                 
                 events.forEach(event => {
                     event.addEventListener('mouseover', function(e) {
-                        const finding = JSON.parse(this.getAttribute('data-finding'));
+                        const [patternType, timeHuman, matchData, memoryRegion] = FINDINGS[this.dataset.idx];
                         
-                        tooltip.innerHTML = `
-                            <strong>${finding.pattern_type}</strong><br>
-                            Time: ${finding.time_human}<br>
-                            Match: ${finding.match_data}<br>
-                            ${finding.memory_region ? `Region: ${finding.memory_region}` : ''}
-                        `;
+                        // Match and region come from the scanned process: insert them as text, never as HTML
+                        const title = document.createElement('strong');
+                        title.textContent = patternType;
+                        tooltip.replaceChildren(
+                            title, document.createElement('br'),
+                            `Time: ${timeHuman}`, document.createElement('br'),
+                            `Match: ${matchData}`, document.createElement('br')
+                        );
+                        if (memoryRegion) {
+                            tooltip.append(`Region: ${memoryRegion}`);
+                        }
                         
                         tooltip.style.left = (e.pageX + 10) + 'px';
                         tooltip.style.top = (e.pageY + 10) + 'px';
@@ -425,4 +536,40 @@ class TimelineTracker:
         </script>
     </body>
     </html>
-    '''
\ No newline at end of file
+    '''
+
+# Page written instead of the full template when nothing was found
+_EMPTY_TIMELINE_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+    <title>MemSift Memory Timeline Visualization</title>
+</head>
+<body style="font-family: Arial, sans-serif; margin: 20px; background-color: #f8f8f8; color: #333;">
+    <h1>MemSift Memory Timeline Visualization</h1>
+    <p>No sensitive data was found during the scan.</p>
+</body>
+</html>
+'''
+
+if jinja2 is not None:
+    # The compiled template code is also cached on disk, in Jinja2's private per-user
+    # temp directory, so later runs load it instead of lexing and compiling again
+    try:
+        _bytecode_cache = jinja2.FileSystemBytecodeCache()
+    except (OSError, RuntimeError):
+        _bytecode_cache = None
+    
+    _JINJA_ENV = jinja2.Environment(
+        loader=jinja2.DictLoader({'timeline.html': _TEMPLATE_SRC}),
+        autoescape=False,
+        auto_reload=False,
+        bytecode_cache=_bytecode_cache
+    )
+    try:
+        _TEMPLATE = _JINJA_ENV.get_template('timeline.html')
+    except OSError:
+        # The cache could not be written; compile without it
+        _JINJA_ENV.bytecode_cache = None
+        _TEMPLATE = _JINJA_ENV.get_template('timeline.html')
+else:
+    _TEMPLATE = None